@@ -0,0 +1,9 @@
+-- Partial covering index for the /auth/status poll:
+--   WHERE device_id = ? AND used = TRUE AND used_at > ? ORDER BY used_at DESC LIMIT 1
+-- Run outside a transaction (psql's default autocommit) because of CONCURRENTLY.
+-- Expected plan: Limit -> Index Only Scan using idx_magic_links_device_used_used_at
+-- (check with EXPLAIN (ANALYZE, BUFFERS)).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_magic_links_device_used_used_at
+    ON tv_app.magic_links (device_id, used_at DESC)
+    INCLUDE (email)
+    WHERE used = TRUE;
@@ -0,0 +1,17 @@
+-- Store the SHA-256 digest of magic-link tokens instead of the tokens
+-- themselves, so a database leak does not expose live sign-in links.
+-- Existing rows are hashed in place (pgcrypto), so unexpired links keep
+-- working. Deploy together with the application release that reads
+-- token_hash.
+BEGIN;
+
+ALTER TABLE tv_app.magic_links ADD COLUMN token_hash BYTEA;
+UPDATE tv_app.magic_links SET token_hash = digest(token, 'sha256');
+
+-- Dropping token also drops its UNIQUE constraint and idx_magic_links_token.
+ALTER TABLE tv_app.magic_links
+    ALTER COLUMN token_hash SET NOT NULL,
+    ADD CONSTRAINT magic_links_token_hash_key UNIQUE (token_hash),
+    DROP COLUMN token;
+
+COMMIT;
@@ -0,0 +1,6 @@
+-- Partial index over live (unused) links for /auth/logout:
+--   UPDATE ... WHERE device_id = ? AND used = FALSE
+-- Run outside a transaction (psql's default autocommit) because of CONCURRENTLY.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_magic_links_active_device
+    ON tv_app.magic_links (device_id)
+    WHERE used = FALSE;
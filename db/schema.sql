@@ -64,7 +64,7 @@ CREATE INDEX idx_entitlements_user ON user_video_entitlements (user_id);
 -- Magic Link Authentication
 CREATE TABLE magic_links (
     magic_link_id       UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-    token               TEXT NOT NULL UNIQUE,
+    token_hash          BYTEA NOT NULL UNIQUE,  -- SHA-256 of the emailed token
     email               CITEXT NOT NULL,
     device_id           TEXT NOT NULL,
     device_model        TEXT,
@@ -76,10 +76,12 @@ CREATE TABLE magic_links (
     used_at             TIMESTAMPTZ
 );
 
-CREATE INDEX idx_magic_links_token ON magic_links(token);
 CREATE INDEX idx_magic_links_email ON magic_links(email);
 CREATE INDEX idx_magic_links_device_id ON magic_links(device_id);
 CREATE INDEX idx_magic_links_expires_at ON magic_links(expires_at) WHERE NOT used;
+CREATE INDEX idx_magic_links_device_used_used_at ON magic_links (device_id, used_at DESC)
+    INCLUDE (email) WHERE used = TRUE;
+CREATE INDEX idx_magic_links_active_device ON magic_links (device_id) WHERE used = FALSE;
 
 -- User Content
 CREATE TABLE user_content (
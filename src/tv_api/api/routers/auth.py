@@ -1,22 +1,27 @@
 """Authentication endpoints for magic link functionality."""
 
+import base64
+import hashlib
+import html
 import logging
-import secrets
-from datetime import datetime, timedelta, timezone
-from typing import Annotated
+import os
+from typing import Annotated, NoReturn
 
 import psycopg
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
 from fastapi.responses import HTMLResponse
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
+from redis import RedisError
 
 from tv_api.config import get_settings
 from tv_api.database import get_db_connection
 from tv_api.email import send_magic_link_email
+from tv_api.rate_limit import rate_limiter
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
+_settings = get_settings()
 
 
 # Request/Response Models
@@ -29,6 +34,12 @@ class MagicLinkRequest(BaseModel):
     deviceManufacturer: str | None = None
     platform: str | None = "android-tv"
 
+    @field_validator("email", mode="after")
+    @classmethod
+    def _lowercase_email(cls, value: str) -> str:
+        """Normalize once so rate-limit keys and stored links agree."""
+        return value.lower()
+
 
 class MagicLinkResponse(BaseModel):
     """Response for magic link request."""
@@ -68,41 +79,63 @@ class ErrorResponse(BaseModel):
     message: str
 
 
-# Rate limiting helper (simple in-memory implementation)
-# For production, consider using Redis
-rate_limit_store: dict[str, list[datetime]] = {}
+# Hot-path SQL. Executed with prepare=True so each pooled connection
+# parses and plans these once and reuses the server-side statement.
+_INSERT_MAGIC_LINK_SQL = """
+    INSERT INTO tv_app.magic_links
+        (token_hash, email, device_id, device_model, device_manufacturer,
+         platform, expires_at)
+    VALUES (%s, %s, %s, %s, %s, %s, NOW() + make_interval(mins => %s))
+"""
 
+# Consume the token and get or create the user in one round-trip.
+# Invalid, expired, used, or foreign-device tokens match no row.
+_VERIFY_MAGIC_LINK_SQL = """
+    WITH ml AS (
+        UPDATE tv_app.magic_links
+        SET used = TRUE, used_at = NOW()
+        WHERE token_hash = %s
+          AND used = FALSE
+          AND expires_at > NOW()
+          AND device_id = %s
+        RETURNING email
+    ), u AS (
+        INSERT INTO tv_app.users (email)
+        SELECT email FROM ml
+        ON CONFLICT (email) DO UPDATE SET email = tv_app.users.email
+        RETURNING user_id, email
+    )
+    SELECT user_id, email FROM u
+"""
 
-def check_rate_limit(key: str, limit: int, window_hours: int = 1) -> bool:
-    """Check if rate limit has been exceeded.
-    
-    Args:
-        key: Rate limit key (e.g., email or IP)
-        limit: Maximum number of requests allowed
-        window_hours: Time window in hours
-        
-    Returns:
-        True if request is allowed, False if rate limit exceeded
-    """
-    now = datetime.utcnow()
-    cutoff = now - timedelta(hours=window_hours)
-    
-    # Clean up old entries
-    if key in rate_limit_store:
-        rate_limit_store[key] = [
-            timestamp for timestamp in rate_limit_store[key] 
-            if timestamp > cutoff
-        ]
-    else:
-        rate_limit_store[key] = []
-    
-    # Check limit
-    if len(rate_limit_store[key]) >= limit:
-        return False
-    
-    # Add new entry
-    rate_limit_store[key].append(now)
-    return True
+# Miss path of the verify CTE; also what bad-token probes and scanners hit
+_MAGIC_LINK_STATE_SQL = """
+    SELECT device_id, used, expires_at > NOW() AS live
+    FROM tv_app.magic_links
+    WHERE token_hash = %s
+"""
+
+_AUTH_STATUS_SQL = """
+    SELECT ml.email, u.user_id
+    FROM tv_app.magic_links ml
+    JOIN tv_app.users u ON u.email = ml.email
+    WHERE ml.device_id = %s
+      AND ml.used = TRUE
+      AND ml.used_at > NOW() - INTERVAL '5 minutes'
+    ORDER BY ml.used_at DESC
+    LIMIT 1
+"""
+
+_LOGOUT_DEVICE_SQL = """
+    UPDATE tv_app.magic_links
+    SET used = TRUE, used_at = NOW()
+    WHERE device_id = %s AND used = FALSE
+"""
+
+
+def _hash_token(token: str) -> bytes:
+    """Return the SHA-256 digest stored in place of a magic-link token."""
+    return hashlib.sha256(token.encode()).digest()
 
 
 @router.post(
@@ -113,12 +146,14 @@ def check_rate_limit(key: str, limit: int, window_hours: int = 1) -> bool:
         200: {"description": "Magic link sent successfully"},
         400: {"model": ErrorResponse, "description": "Invalid email address"},
         429: {"model": ErrorResponse, "description": "Too many requests"},
-        500: {"model": ErrorResponse, "description": "Failed to send magic link"},
+        500: {"model": ErrorResponse, "description": "Failed to store magic link"},
+        503: {"model": ErrorResponse, "description": "Rate limiter unavailable"},
     },
 )
 async def request_magic_link(
     payload: MagicLinkRequest,
     request: Request,
+    background_tasks: BackgroundTasks,
     conn: Annotated[psycopg.AsyncConnection, Depends(get_db_connection)],
 ) -> MagicLinkResponse:
     """Generate a magic link and send it to the user's email address.
@@ -128,197 +163,80 @@ async def request_magic_link(
     2. Checks rate limits
     3. Generates a unique secure token
     4. Stores the magic link in the database
-    5. Sends the email with the magic link
+    5. Queues the email with the magic link to send after responding
     """
-    settings = get_settings()
-    
-    # Rate limiting by email
-    email_key = f"email:{payload.email.lower()}"
-    if not check_rate_limit(email_key, settings.rate_limit_per_email_per_hour):
+    # Rate limiting by email and IP (one Redis round-trip)
+    client_ip = request.client.host if request.client else "unknown"
+    try:
+        retry_after = await rate_limiter.check(
+            [
+                (f"email:{payload.email}", _settings.rate_limit_per_email_per_hour),
+                (f"ip:{client_ip}", _settings.rate_limit_per_ip_per_hour),
+            ]
+        )
+    except RedisError as e:
+        # Includes pool exhaustion; fail closed rather than send unmetered email
+        logger.error(f"Rate limiter unavailable: {e}")
         raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Too many requests. Please try again later.",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service temporarily unavailable. Please try again later.",
         )
-    
-    # Rate limiting by IP
-    client_ip = request.client.host if request.client else "unknown"
-    ip_key = f"ip:{client_ip}"
-    if not check_rate_limit(ip_key, settings.rate_limit_per_ip_per_hour):
+    if retry_after:
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many requests. Please try again later.",
+            headers={"Retry-After": str(retry_after)},
         )
     
-    # Generate secure token
-    token = secrets.token_urlsafe(32)
-    
-    # Calculate expiration
-    expires_at = datetime.now(timezone.utc) + timedelta(
-        minutes=settings.magic_link_expiry_minutes
-    )
+    # Generate secure token; only its hash is stored
+    token = base64.urlsafe_b64encode(os.urandom(32)).rstrip(b"=").decode("ascii")
     
     try:
         # Store magic link in database
-        async with conn.cursor() as cur:
-            await cur.execute(
-                """
-                INSERT INTO tv_app.magic_links 
-                    (token, email, device_id, device_model, device_manufacturer, 
-                     platform, expires_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """,
-                (
-                    token,
-                    payload.email.lower(),
-                    payload.deviceId,
-                    payload.deviceModel,
-                    payload.deviceManufacturer,
-                    payload.platform,
-                    expires_at,
-                ),
-            )
-        
-        # Create magic link URL
-        magic_link_url = f"{settings.magic_link_base_url}?token={token}&deviceId={payload.deviceId}"
-        
-        # Send email
-        email_sent = await send_magic_link_email(
-            to_email=payload.email,
-            magic_link_url=magic_link_url,
-            device_model=payload.deviceModel,
-            device_manufacturer=payload.deviceManufacturer,
-            device_id=payload.deviceId,
+        await conn.execute(
+            _INSERT_MAGIC_LINK_SQL,
+            (
+                _hash_token(token),
+                payload.email,
+                payload.deviceId,
+                payload.deviceModel,
+                payload.deviceManufacturer,
+                payload.platform,
+                _settings.magic_link_expiry_minutes,
+            ),
+            prepare=True,
         )
-        
-        if not email_sent:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to send magic link",
-            )
-        
-        return MagicLinkResponse(
-            success=True,
-            message="Magic link sent! Check your email to complete sign in.",
-        )
-        
-    except HTTPException:
-        raise
+        # Commit before the email goes out so the link is valid on arrival
+        await conn.commit()
     except Exception as e:
         logger.error(f"Error creating magic link: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to send magic link",
         )
-
-
-@router.get(
-    "/verify",
-    summary="Verify magic link",
-    responses={
-        200: {"description": "Magic link verified successfully", "content": {"text/html": {}}},
-        400: {"description": "Missing required parameters"},
-        401: {"description": "Invalid or expired magic link"},
-        410: {"description": "Magic link already used"},
-    },
-)
-async def verify_magic_link(
-    token: Annotated[str, Query(description="Magic link token")],
-    deviceId: Annotated[str, Query(description="Device ID")],
-    conn: Annotated[psycopg.AsyncConnection, Depends(get_db_connection)],
-) -> HTMLResponse:
-    """Verify the magic link token and return user information.
-    
-    This endpoint:
-    1. Validates the token and device ID
-    2. Checks if the token has expired
-    3. Verifies the device ID matches
-    4. Checks if the token has already been used
-    5. Marks the token as used
-    6. Creates or retrieves the user
-    7. Returns user information
-    """
-    
-    # Find the magic link
-    async with conn.cursor() as cur:
-        await cur.execute(
-            """
-            SELECT magic_link_id, token, email, device_id, expires_at, used, used_at
-            FROM tv_app.magic_links
-            WHERE token = %s
-            """,
-            (token,),
-        )
-        magic_link = await cur.fetchone()
-    
-    if not magic_link:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired magic link",
-        )
     
-    # Check if expired
-    if datetime.now(timezone.utc) > magic_link["expires_at"]:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired magic link",
-        )
-    
-    # Check if already used
-    if magic_link["used"]:
-        raise HTTPException(
-            status_code=status.HTTP_410_GONE,
-            detail="This magic link has already been used",
-        )
+    # Create magic link URL
+    magic_link_url = f"{_settings.magic_link_base_url}?token={token}&deviceId={payload.deviceId}"
     
-    # Verify device ID matches
-    if magic_link["device_id"] != deviceId:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="This link was issued for a different device",
-        )
+    # Send email after the response so SMTP latency stays off the request path.
+    # Delivery failures are logged by send_magic_link_email.
+    background_tasks.add_task(
+        send_magic_link_email,
+        to_email=payload.email,
+        magic_link_url=magic_link_url,
+        device_model=payload.deviceModel,
+        device_manufacturer=payload.deviceManufacturer,
+        device_id=payload.deviceId,
+    )
     
-    try:
-        async with conn.cursor() as cur:
-            # Mark token as used
-            await cur.execute(
-                """
-                UPDATE tv_app.magic_links
-                SET used = TRUE, used_at = NOW()
-                WHERE token = %s
-                """,
-                (token,),
-            )
-            
-            # Get or create user
-            await cur.execute(
-                """
-                SELECT user_id, email
-                FROM tv_app.users
-                WHERE email = %s
-                """,
-                (magic_link["email"],),
-            )
-            user = await cur.fetchone()
-            
-            if not user:
-                # Create new user
-                await cur.execute(
-                    """
-                    INSERT INTO tv_app.users (email)
-                    VALUES (%s)
-                    RETURNING user_id, email
-                    """,
-                    (magic_link["email"],),
-                )
-                user = await cur.fetchone()
-        
-        logger.info(
-            f"Magic link verified successfully for user {user['user_id']} "
-            f"on device {deviceId}"
-        )
-        
-        # Return HTML success page
-        html_content = f"""
+    return MagicLinkResponse(
+        success=True,
+        message="Magic link sent! Check your email to complete sign in.",
+    )
+
+
+# Verify success page, pre-encoded around its two dynamic fields
+_VERIFY_SUCCESS_PREFIX = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -326,7 +244,7 @@ async def verify_magic_link(
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Sign In Successful - dil.map</title>
     <style>
-        body {{
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
             display: flex;
             justify-content: center;
@@ -334,47 +252,47 @@ async def verify_magic_link(
             min-height: 100vh;
             margin: 0;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        }}
-        .container {{
+        }
+        .container {
             background: white;
             padding: 3rem;
             border-radius: 1rem;
             box-shadow: 0 20px 60px rgba(0, 0, 0, 0.3);
             text-align: center;
             max-width: 500px;
-        }}
-        .success-icon {{
+        }
+        .success-icon {
             font-size: 4rem;
             margin-bottom: 1rem;
-        }}
-        h1 {{
+        }
+        h1 {
             color: #2d3748;
             margin: 0 0 1rem;
             font-size: 2rem;
-        }}
-        p {{
+        }
+        p {
             color: #4a5568;
             font-size: 1.1rem;
             line-height: 1.6;
             margin: 0.5rem 0;
-        }}
-        .email {{
+        }
+        .email {
             color: #667eea;
             font-weight: 600;
-        }}
-        .device {{
+        }
+        .device {
             background: #f7fafc;
             padding: 1rem;
             border-radius: 0.5rem;
             margin-top: 1.5rem;
             font-size: 0.9rem;
             color: #718096;
-        }}
-        .footer {{
+        }
+        .footer {
             margin-top: 2rem;
             font-size: 0.9rem;
             color: #a0aec0;
-        }}
+        }
     </style>
 </head>
 <body>
@@ -382,9 +300,11 @@ async def verify_magic_link(
         <div class="success-icon">✓</div>
         <h1>You're all set!</h1>
         <p>Your TV has been successfully authenticated.</p>
-        <p>Signed in as <span class="email">{user["email"]}</span></p>
+        <p>Signed in as <span class="email">""".encode()
+_VERIFY_SUCCESS_MIDDLE = """</span></p>
         <div class="device">
-            Device ID: {deviceId[:12]}...
+            Device ID: """.encode()
+_VERIFY_SUCCESS_SUFFIX = """...
         </div>
         <div class="footer">
             You can close this window and return to your TV.
@@ -392,16 +312,105 @@ async def verify_magic_link(
     </div>
 </body>
 </html>
-"""
-        
-        return HTMLResponse(content=html_content, status_code=200)
+""".encode()
+
+
+async def _raise_unusable_magic_link(
+    conn: psycopg.AsyncConnection,
+    token_hash: bytes,
+    device_id: str,
+) -> NoReturn:
+    """Raise the HTTP error explaining why a magic link could not be used.
+    
+    Only runs on the miss path of ``verify_magic_link``, so the happy path
+    stays a single round-trip.
+    """
+    cur = await conn.execute(_MAGIC_LINK_STATE_SQL, (token_hash,), prepare=True)
+    magic_link = await cur.fetchone()
+    
+    if magic_link and magic_link["live"]:
+        # Check if already used
+        if magic_link["used"]:
+            raise HTTPException(
+                status_code=status.HTTP_410_GONE,
+                detail="This magic link has already been used",
+            )
         
+        # Verify device ID matches
+        if magic_link["device_id"] != device_id:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="This link was issued for a different device",
+            )
+    
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired magic link",
+    )
+
+
+@router.get(
+    "/verify",
+    summary="Verify magic link",
+    responses={
+        200: {"description": "Magic link verified successfully", "content": {"text/html": {}}},
+        400: {"description": "Missing required parameters"},
+        401: {"description": "Invalid or expired magic link"},
+        410: {"description": "Magic link already used"},
+    },
+)
+async def verify_magic_link(
+    token: Annotated[str, Query(description="Magic link token")],
+    deviceId: Annotated[str, Query(description="Device ID")],
+    conn: Annotated[psycopg.AsyncConnection, Depends(get_db_connection)],
+) -> HTMLResponse:
+    """Verify the magic link token and return user information.
+    
+    This endpoint:
+    1. Validates the token and device ID
+    2. Checks if the token has expired
+    3. Verifies the device ID matches
+    4. Checks if the token has already been used
+    5. Marks the token as used
+    6. Creates or retrieves the user
+    7. Returns user information
+    """
+    
+    token_hash = _hash_token(token)
+    try:
+        cur = await conn.execute(
+            _VERIFY_MAGIC_LINK_SQL,
+            (token_hash, deviceId),
+            prepare=True,
+        )
+        user = await cur.fetchone()
     except Exception as e:
         logger.error(f"Error verifying magic link: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to verify magic link",
         )
+    
+    if not user:
+        await _raise_unusable_magic_link(conn, token_hash, deviceId)
+    
+    logger.info(
+        f"Magic link verified successfully for user {user['user_id']} "
+        f"on device {deviceId}"
+    )
+
+    # Return HTML success page
+    html_content = b"".join(
+        (
+            _VERIFY_SUCCESS_PREFIX,
+            html.escape(user["email"]).encode(),
+            _VERIFY_SUCCESS_MIDDLE,
+            html.escape(deviceId[:12]).encode(),
+            _VERIFY_SUCCESS_SUFFIX,
+        )
+    )
+
+    return HTMLResponse(content=html_content, status_code=200)
 
 
 @router.get(
@@ -429,23 +438,8 @@ async def check_auth_status(
     
     # Look for recently verified magic links for this device
     # Check within last 5 minutes to allow for the auth flow
-    cutoff_time = datetime.now(timezone.utc) - timedelta(minutes=5)
-    
-    async with conn.cursor() as cur:
-        await cur.execute(
-            """
-            SELECT ml.email, u.user_id
-            FROM tv_app.magic_links ml
-            JOIN tv_app.users u ON u.email = ml.email
-            WHERE ml.device_id = %s
-              AND ml.used = TRUE
-              AND ml.used_at > %s
-            ORDER BY ml.used_at DESC
-            LIMIT 1
-            """,
-            (deviceId, cutoff_time),
-        )
-        result = await cur.fetchone()
+    cur = await conn.execute(_AUTH_STATUS_SQL, (deviceId,), prepare=True)
+    result = await cur.fetchone()
     
     if result:
         return AuthStatusResponse(
@@ -482,17 +476,9 @@ async def logout_device(
     """
     
     try:
-        async with conn.cursor() as cur:
-            # Mark all magic links for this device as used
-            await cur.execute(
-                """
-                UPDATE tv_app.magic_links
-                SET used = TRUE, used_at = NOW()
-                WHERE device_id = %s AND used = FALSE
-                """,
-                (deviceId,),
-            )
-            rows_updated = cur.rowcount
+        # Mark all magic links for this device as used
+        cur = await conn.execute(_LOGOUT_DEVICE_SQL, (deviceId,), prepare=True)
+        rows_updated = cur.rowcount
         
         logger.info(f"Device {deviceId} logged out, invalidated {rows_updated} magic links")
         
@@ -2,21 +2,69 @@
 
 from __future__ import annotations
 
+import hashlib
+import os
+import shutil
+import time
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from operator import attrgetter
 from pathlib import Path
-from typing import Annotated
+from stat import S_ISREG
+from typing import Annotated, BinaryIO
+from uuid import UUID
 
+import anyio
+import orjson
 import psycopg
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File
+from psycopg.rows import class_row
 from pydantic import BaseModel
 
 from tv_api.config import get_settings
-from tv_api.database import get_db_connection
+from tv_api.database import db, get_db_connection
 from tv_api.logging import get_logger
+from tv_api.responses import ZeroCopyFileResponse
 
 router = APIRouter(prefix="/content", tags=["content"])
 _logger = get_logger("content")
+_settings = get_settings()
+
+# Resolved once at startup by init_assets_root()
+_assets_root_path: Path | None = None
+
+_ASSET_CACHE_CONTROL = "public, max-age=3600"
+
+_UPLOAD_COPY_BUFFER_SIZE = 1 << 20
+
+# Positive ownership checks for user downloads, (user_id, filename) -> expiry.
+# Players re-request the same file while seeking; only grants are cached so
+# newly created content is never hidden by a stale entry.
+_DOWNLOAD_AUTH_TTL_SECONDS = 60.0
+_DOWNLOAD_AUTH_MAX_ENTRIES = 4096
+_download_auth_cache: dict[tuple[str, str], float] = {}
+
+_OWNS_CONTENT_SQL = """
+SELECT content_id
+FROM tv_app.user_content
+WHERE user_id = %s
+  AND (video_filename = %s OR thumbnail_filename = %s)
+"""
+
+# User content types; keys double as the upload extension allow-list
+_MIME_BY_EXT = {
+    ".mp4": "video/mp4",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+}
+
+# (assets directory mtime_ns, serialized listing body)
+_listing_cache: tuple[int, bytes] | None = None
+
+# (content.json mtime_ns, public catalogue built from it)
+_public_content_cache: tuple[int, list[ContentItem]] | None = None
 
 
 class ContentItem(BaseModel):
@@ -32,6 +80,19 @@ class ContentItem(BaseModel):
     is_user_content: bool = False
 
 
+@dataclass(slots=True)
+class UserContentRow:
+    """Row of the user_content listing query."""
+
+    content_id: UUID
+    title: str
+    description: str | None
+    video_filename: str
+    thumbnail_filename: str | None
+    duration_secs: int | None
+    created_at: datetime
+
+
 class CreateContentRequest(BaseModel):
     """Request to create user content."""
     
@@ -62,41 +123,121 @@ class UploadFileResponse(BaseModel):
     message: str
 
 
-def _assets_root() -> Path:
-    settings = get_settings()
-    root = Path(settings.assets_dir).resolve()
-    if not root.exists() or not root.is_dir():
+def init_assets_root() -> Path:
+    """Resolve the configured assets directory and cache it for request handlers."""
+    global _assets_root_path
+
+    root = Path(_settings.assets_dir).resolve()
+    if not root.is_dir():
         _logger.warning("assets directory missing", extra={"path": str(root)})
-        raise HTTPException(status_code=404, detail="Assets directory not found")
+    _assets_root_path = root
     return root
 
 
-@router.get("", summary="List downloadable assets")
-async def list_assets() -> dict[str, list[dict[str, object]]]:
-    """Return metadata about the files that can be downloaded."""
+def _assets_root() -> Path:
+    # No per-request stat: a missing directory surfaces as a 404 from the
+    # handler's own filesystem access
+    return _assets_root_path or init_assets_root()
 
-    root = _assets_root()
+
+def _is_plain_name(name: str) -> bool:
+    """Return whether ``name`` is a single path component that stays in its directory."""
+
+    return name not in ("", ".", "..") and "/" not in name and "\\" not in name and "\0" not in name
+
+
+def _render_listing(root: Path) -> bytes:
+    """Scan the assets directory and serialize the listing body."""
+
+    # DirEntry carries the file type from readdir, so is_file() costs no syscall
+    with os.scandir(root) as it:
+        entries = [entry for entry in it if entry.is_file()]
+    entries.sort(key=attrgetter("name"))
+
+    # orjson formats datetimes natively in C; hoist the constructor and tzinfo
+    fromtimestamp = datetime.fromtimestamp
+    utc = timezone.utc
     items: list[dict[str, object]] = []
-    for entry in sorted(root.iterdir()):
-        if not entry.is_file():
-            continue
+    for entry in entries:
         stat = entry.stat()
         items.append(
             {
                 "name": entry.name,
                 "size_bytes": stat.st_size,
-                "modified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+                "modified": fromtimestamp(stat.st_mtime, utc),
                 "download_path": f"/content/{entry.name}",
             }
         )
-    return {"items": items}
+    return orjson.dumps({"items": items})
 
 
-@router.get("/user", summary="Get user's content (public + private)")
+@router.get("", summary="List downloadable assets")
+async def list_assets() -> Response:
+    """Return metadata about the files that can be downloaded.
+
+    The serialized listing is cached until the assets directory's mtime
+    changes (files added, removed or renamed).
+    """
+    global _listing_cache
+
+    root = _assets_root()
+    try:
+        root_mtime = root.stat().st_mtime_ns
+    except OSError:
+        raise HTTPException(status_code=404, detail="Assets directory not found") from None
+    if _listing_cache is None or _listing_cache[0] != root_mtime:
+        # The scan is O(entries) in blocking syscalls; keep it off the event loop
+        body = await anyio.to_thread.run_sync(_render_listing, root)
+        _listing_cache = (root_mtime, body)
+    return Response(content=_listing_cache[1], media_type="application/json")
+
+
+def _public_content(root: Path) -> list[ContentItem]:
+    """Return the public catalogue from content.json, re-parsed only when it changes."""
+    global _public_content_cache
+
+    content_json_path = root / "content.json"
+    try:
+        mtime = content_json_path.stat().st_mtime_ns
+    except OSError:
+        return []
+    if _public_content_cache is not None and _public_content_cache[0] == mtime:
+        return _public_content_cache[1]
+
+    items: list[ContentItem] = []
+    try:
+        public_data = orjson.loads(content_json_path.read_bytes())
+        for item in public_data.get("items", []):
+            items.append(
+                ContentItem.model_construct(
+                    content_id=item.get("name", "unknown"),
+                    title=item.get("name", "Untitled"),
+                    description=None,
+                    video_url=f"/content/{item.get('name')}",
+                    thumbnail_url=None,
+                    duration_secs=None,
+                    created_at=item.get("modified", datetime.now(timezone.utc).isoformat()),
+                    is_user_content=False,
+                )
+            )
+    except Exception as e:
+        _logger.warning(f"Failed to load content.json: {e}")
+    _public_content_cache = (mtime, items)
+    return items
+
+
+# Items are built with model_construct from trusted sources (content.json,
+# typed DB rows). Returning a Response bypasses response_model validation and
+# jsonable_encoder; the model only documents the schema in OpenAPI.
+@router.get(
+    "/user",
+    summary="Get user's content (public + private)",
+    response_model=dict[str, list[ContentItem]],
+)
 async def get_user_content(
     userId: Annotated[str, Query(description="User ID")],
     conn: Annotated[psycopg.AsyncConnection, Depends(get_db_connection)],
-) -> dict[str, list[ContentItem]]:
+) -> Response:
     """Get all content available to a user (default public content + user's private content).
     
     Returns:
@@ -104,36 +245,12 @@ async def get_user_content(
     - User's private content from database
     """
     
-    settings = get_settings()
-    root = _assets_root()
-    content_items: list[ContentItem] = []
-    
-    # Load public content from content.json
-    content_json_path = root / "content.json"
-    if content_json_path.exists():
-        import json
-        try:
-            with open(content_json_path) as f:
-                public_data = json.load(f)
-                for item in public_data.get("items", []):
-                    content_items.append(
-                        ContentItem(
-                            content_id=item.get("name", "unknown"),
-                            title=item.get("name", "Untitled"),
-                            description=None,
-                            video_url=f"/content/{item.get('name')}",
-                            thumbnail_url=None,
-                            duration_secs=None,
-                            created_at=item.get("modified", datetime.now(timezone.utc).isoformat()),
-                            is_user_content=False,
-                        )
-                    )
-        except Exception as e:
-            _logger.warning(f"Failed to load content.json: {e}")
+    # Public content from content.json (copied so the cached list stays intact)
+    content_items = list(_public_content(_assets_root()))
     
     # Load user's private content from database
     try:
-        async with conn.cursor() as cur:
+        async with conn.cursor(row_factory=class_row(UserContentRow)) as cur:
             await cur.execute(
                 """
                 SELECT content_id, title, description, video_filename, 
@@ -148,18 +265,18 @@ async def get_user_content(
             
             for row in rows:
                 # Build URLs for user's content
-                video_url = f"/content/user/{userId}/{row['video_filename']}"
-                thumbnail_url = f"/content/user/{userId}/{row['thumbnail_filename']}" if row['thumbnail_filename'] else None
+                video_url = f"/content/user/{userId}/{row.video_filename}"
+                thumbnail_url = f"/content/user/{userId}/{row.thumbnail_filename}" if row.thumbnail_filename else None
                 
                 content_items.append(
-                    ContentItem(
-                        content_id=str(row['content_id']),
-                        title=row['title'],
-                        description=row['description'],
+                    ContentItem.model_construct(
+                        content_id=str(row.content_id),
+                        title=row.title,
+                        description=row.description,
                         video_url=video_url,
                         thumbnail_url=thumbnail_url,
-                        duration_secs=row['duration_secs'],
-                        created_at=row['created_at'].isoformat(),
+                        duration_secs=row.duration_secs,
+                        created_at=row.created_at.isoformat(),
                         is_user_content=True,
                     )
                 )
@@ -171,62 +288,70 @@ async def get_user_content(
             detail="Failed to fetch user content",
         )
     
-    return {"items": content_items}
+    return Response(
+        content=orjson.dumps({"items": content_items}, default=vars),
+        media_type="application/json",
+    )
+
+
+async def _owns_content(user_id: str, filename: str) -> bool:
+    """Return whether ``filename`` belongs to ``user_id``, consulting the TTL cache first."""
+
+    key = (user_id, filename)
+    now = time.monotonic()
+    expires = _download_auth_cache.get(key)
+    if expires is not None and now < expires:
+        return True
+
+    # Only a cache miss borrows a pooled connection
+    async with db.acquire() as conn:
+        cur = await conn.execute(_OWNS_CONTENT_SQL, (user_id, filename, filename), prepare=True)
+        result = await cur.fetchone()
+
+    _download_auth_cache.pop(key, None)
+    if result is None:
+        return False
+    if len(_download_auth_cache) >= _DOWNLOAD_AUTH_MAX_ENTRIES:
+        # Dicts keep insertion order, so the first key is the oldest grant
+        del _download_auth_cache[next(iter(_download_auth_cache))]
+    _download_auth_cache[key] = now + _DOWNLOAD_AUTH_TTL_SECONDS
+    return True
 
 
 @router.get("/user/{user_id}/{filename}", summary="Download user's private content")
-async def download_user_content(
-    user_id: str,
-    filename: str,
-    conn: Annotated[psycopg.AsyncConnection, Depends(get_db_connection)],
-) -> FileResponse:
+async def download_user_content(user_id: str, filename: str) -> ZeroCopyFileResponse:
     """Stream user's private video or thumbnail file.
     
-    Validates that the file exists in the database before serving.
+    Validates that the file exists in the database before serving; the
+    answer is cached for a minute so repeated range requests skip the query.
     """
     
-    # Verify the file belongs to this user
-    async with conn.cursor() as cur:
-        await cur.execute(
-            """
-            SELECT content_id
-            FROM tv_app.user_content
-            WHERE user_id = %s 
-              AND (video_filename = %s OR thumbnail_filename = %s)
-            """,
-            (user_id, filename, filename),
-        )
-        result = await cur.fetchone()
+    # Security: both segments must be plain names so the path stays in the
+    # user's directory; no resolve() needed
+    if not (_is_plain_name(user_id) and _is_plain_name(filename)):
+        raise HTTPException(status_code=404, detail="File not found")
     
-    if not result:
+    # Verify the file belongs to this user
+    if not await _owns_content(user_id, filename):
         raise HTTPException(status_code=404, detail="Content not found")
     
     # Serve the file
-    root = _assets_root()
-    user_dir = root / user_id
-    file_path = (user_dir / Path(filename).name).resolve()
-    
-    # Security: ensure file is within user's directory
+    file_path = _assets_root() / user_id / filename
     try:
-        file_path.relative_to(user_dir)
-    except ValueError:
-        raise HTTPException(status_code=404, detail="File not found")
-    
-    if not file_path.is_file():
+        stat_result = file_path.stat()
+    except OSError:
+        raise HTTPException(status_code=404, detail="File not found") from None
+    if not S_ISREG(stat_result.st_mode):
         raise HTTPException(status_code=404, detail="File not found")
     
     _logger.info(f"Serving user content: {user_id}/{filename}")
     
     # Determine media type
-    media_type = "application/octet-stream"
-    if filename.endswith(".mp4"):
-        media_type = "video/mp4"
-    elif filename.endswith((".jpg", ".jpeg")):
-        media_type = "image/jpeg"
-    elif filename.endswith(".png"):
-        media_type = "image/png"
+    media_type = _MIME_BY_EXT.get(Path(filename).suffix.lower(), "application/octet-stream")
     
-    return FileResponse(file_path, media_type=media_type, filename=filename)
+    return ZeroCopyFileResponse(
+        file_path, media_type=media_type, filename=filename, stat_result=stat_result
+    )
 
 
 @router.post("/user/create", summary="Create user content metadata")
@@ -243,17 +368,6 @@ async def create_user_content(
     The files should be uploaded separately (via FTP, SCP, or a file upload endpoint).
     """
     
-    # Verify user exists
-    async with conn.cursor() as cur:
-        await cur.execute(
-            "SELECT user_id FROM tv_app.users WHERE user_id = %s",
-            (payload.user_id,),
-        )
-        user = await cur.fetchone()
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Verify video file exists in user's directory
     root = _assets_root()
     user_dir = root / payload.user_id
@@ -274,7 +388,8 @@ async def create_user_content(
                 detail=f"Thumbnail file not found: {payload.thumbnail_filename}",
             )
     
-    # Create content record
+    # Create content record; selecting from users inserts nothing when the
+    # user does not exist, so no separate existence check is needed
     try:
         async with conn.cursor() as cur:
             await cur.execute(
@@ -282,11 +397,12 @@ async def create_user_content(
                 INSERT INTO tv_app.user_content 
                     (user_id, title, description, video_filename, thumbnail_filename,
                      duration_secs, file_size_bytes, is_public)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                SELECT user_id, %s, %s, %s, %s, %s, %s, %s
+                FROM tv_app.users
+                WHERE user_id = %s
                 RETURNING content_id
                 """,
                 (
-                    payload.user_id,
                     payload.title,
                     payload.description,
                     payload.video_filename,
@@ -294,18 +410,10 @@ async def create_user_content(
                     payload.duration_secs,
                     payload.file_size_bytes,
                     payload.is_public,
+                    payload.user_id,
                 ),
             )
             result = await cur.fetchone()
-            content_id = str(result["content_id"])
-        
-        _logger.info(f"Created content {content_id} for user {payload.user_id}")
-        
-        return CreateContentResponse(
-            success=True,
-            content_id=content_id,
-            message="Content created successfully",
-        )
     
     except Exception as e:
         _logger.error(f"Error creating content: {e}")
@@ -313,6 +421,27 @@ async def create_user_content(
             status_code=500,
             detail="Failed to create content",
         )
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    content_id = str(result["content_id"])
+    _logger.info(f"Created content {content_id} for user {payload.user_id}")
+    
+    return CreateContentResponse(
+        success=True,
+        content_id=content_id,
+        message="Content created successfully",
+    )
+
+
+def _save_upload(source: BinaryIO, destination: Path) -> int:
+    """Copy an upload's spooled file to ``destination`` and return its size."""
+
+    source.seek(0)
+    with open(destination, "wb") as f:
+        shutil.copyfileobj(source, f, _UPLOAD_COPY_BUFFER_SIZE)
+        return f.tell()
 
 
 @router.post("/user/upload", summary="Upload a file for user content")
@@ -349,14 +478,12 @@ async def upload_user_file(
     if not file.filename:
         raise HTTPException(status_code=400, detail="No filename provided")
     
-    filename = file.filename.lower()
-    allowed_extensions = {'.mp4', '.jpg', '.jpeg', '.png'}
-    file_ext = Path(filename).suffix
+    file_ext = Path(file.filename).suffix.lower()
     
-    if file_ext not in allowed_extensions:
+    if file_ext not in _MIME_BY_EXT:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}",
+            detail=f"Invalid file type. Allowed: {', '.join(_MIME_BY_EXT)}",
         )
     
     # Sanitize filename (remove path components)
@@ -371,12 +498,8 @@ async def upload_user_file(
     file_path = user_dir / safe_filename
     
     try:
-        # Read and write file in chunks
-        total_bytes = 0
-        with open(file_path, 'wb') as f:
-            while chunk := await file.read(8192):  # 8KB chunks
-                f.write(chunk)
-                total_bytes += len(chunk)
+        # Copy in 1 MiB blocks on a worker thread so disk writes don't block the loop
+        total_bytes = await anyio.to_thread.run_sync(_save_upload, file.file, file_path)
         
         _logger.info(f"Uploaded {safe_filename} for user {userId} ({total_bytes} bytes)")
         
@@ -398,19 +521,59 @@ async def upload_user_file(
         )
 
 
+def _is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """Evaluate the request's conditional headers against a file's validators."""
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in tags or "*" in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since.timestamp()
+    return False
+
+
 @router.get("/{filename}", summary="Download an asset")
-async def download_asset(filename: str) -> FileResponse:
-    """Stream the requested file if it exists under the assets directory."""
+async def download_asset(filename: str, request: Request) -> Response:
+    """Stream the requested file if it exists under the assets directory.
+
+    Responses carry ``ETag``/``Last-Modified`` validators so clients can
+    revalidate cached downloads and receive an empty 304 instead.
+    """
+
+    # Path traversal guard on the raw segment; avoids resolve()'s readlink calls
+    if not _is_plain_name(filename):
+        raise HTTPException(status_code=404, detail="File not found")
+    candidate = _assets_root() / filename
 
-    root = _assets_root()
-    candidate = (root / Path(filename).name).resolve()
     try:
-        candidate.relative_to(root)
-    except ValueError:  # pragma: no cover - defensive path traversal guard
+        stat_result = candidate.stat()
+    except OSError:
         raise HTTPException(status_code=404, detail="File not found") from None
-
-    if not candidate.is_file():
+    if not S_ISREG(stat_result.st_mode):
         raise HTTPException(status_code=404, detail="File not found")
 
+    etag_base = f"{stat_result.st_ino}-{stat_result.st_mtime_ns}-{stat_result.st_size}"
+    etag = f'"{hashlib.blake2b(etag_base.encode(), digest_size=16).hexdigest()}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": _ASSET_CACHE_CONTROL,
+    }
+    if _is_not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
     _logger.info("serving asset %s", candidate.name)
-    return FileResponse(candidate, media_type="application/octet-stream", filename=candidate.name)
+    return ZeroCopyFileResponse(
+        candidate,
+        media_type="application/octet-stream",
+        filename=candidate.name,
+        headers=headers,
+        stat_result=stat_result,
+    )
@@ -1,22 +1,29 @@
 """Health and readiness endpoints."""
 
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Response
 
 from tv_api.config import get_settings
 
 router = APIRouter(tags=["diagnostics"])
+_settings = get_settings()
 
+# Probe bodies never change while the process runs; serialize them once
+_HEALTH_BODY = orjson.dumps(
+    {"status": "ok", "service": _settings.app_name, "environment": _settings.environment}
+)
+_READINESS_BODY = orjson.dumps({"status": "ready"})
 
-@router.get("/health", summary="Liveness probe")
-async def health_check() -> dict[str, str]:
+
+@router.get("/health", summary="Liveness probe", response_model=dict[str, str])
+async def health_check() -> Response:
     """Signal that the API process is running."""
 
-    settings = get_settings()
-    return {"status": "ok", "service": settings.app_name, "environment": settings.environment}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
-@router.get("/readiness", summary="Readiness probe")
-async def readiness_check() -> dict[str, str]:
+@router.get("/readiness", summary="Readiness probe", response_model=dict[str, str])
+async def readiness_check() -> Response:
     """Signal that the API is ready to accept traffic."""
 
-    return {"status": "ready"}
+    return Response(content=_READINESS_BODY, media_type="application/json")
@@ -1,26 +1,33 @@
 """Static informational endpoints."""
 
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Response
 
 from tv_api.config import get_settings
 
 router = APIRouter(tags=["info"])
+_settings = get_settings()
 
+_POLICY = (
+    "Dilworth Creative LLC only processes the information required to deliver"
+    " purchased art shows. Email addresses are used strictly to authenticate"
+    " purchases, and any media streaming activity stays on your device. No"
+    " personal data is sold or shared with third parties."
+)
 
-@router.get("/privacy", summary="Privacy policy")
-async def privacy_policy() -> dict[str, str]:
-    """Return a minimal privacy statement suitable for store listings."""
-
-    settings = get_settings()
-    policy = (
-        "Dilworth Creative LLC only processes the information required to deliver"
-        " purchased art shows. Email addresses are used strictly to authenticate"
-        " purchases, and any media streaming activity stays on your device. No"
-        " personal data is sold or shared with third parties."
-    )
-    return {
-        "application": settings.app_name,
+# Static for the lifetime of the process; serialized once at import
+_PRIVACY_BODY = orjson.dumps(
+    {
+        "application": _settings.app_name,
         "owner": "Dilworth Creative LLC",
         "contact": "hello@lucindadilworth.com",
-        "policy": policy,
+        "policy": _POLICY,
     }
+)
+
+
+@router.get("/privacy", summary="Privacy policy", response_model=dict[str, str])
+async def privacy_policy() -> Response:
+    """Return a minimal privacy statement suitable for store listings."""
+
+    return Response(content=_PRIVACY_BODY, media_type="application/json")
@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 import hmac
-import hashlib
+from base64 import b64decode
 from typing import Annotated
 
+import anyio
+import orjson
 import psycopg
 from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
 from pydantic import BaseModel, EmailStr
@@ -16,6 +18,10 @@ from tv_api.logging import get_logger
 
 router = APIRouter(prefix="/shopify", tags=["shopify"])
 logger = get_logger("shopify")
+_settings = get_settings()
+
+# Bodies at least this large are signed off the event loop
+_INLINE_HMAC_MAX_BYTES = 64 * 1024
 
 
 class ShopifyCustomer(BaseModel):
@@ -37,17 +43,17 @@ class WebhookResponse(BaseModel):
     user_id: str | None = None
 
 
-def verify_shopify_webhook(
+async def verify_shopify_webhook(
     body: bytes,
     hmac_header: str | None,
-    secret: str,
+    secret: bytes,
 ) -> bool:
     """Verify Shopify webhook signature using HMAC-SHA256.
     
     Args:
         body: Raw request body bytes
         hmac_header: X-Shopify-Hmac-SHA256 header value (base64 encoded)
-        secret: Shopify webhook secret
+        secret: Shopify webhook secret, UTF-8 encoded
     
     Returns:
         True if signature is valid, False otherwise
@@ -55,20 +61,21 @@ def verify_shopify_webhook(
     if not hmac_header or not secret:
         return False
     
-    # Compute HMAC-SHA256 of the body
-    computed_hmac = hmac.new(
-        secret.encode('utf-8'),
-        body,
-        hashlib.sha256
-    ).digest()
-    
-    # Shopify sends the HMAC as base64
-    import base64
+    # Shopify sends the HMAC as base64; a malformed header fails before hashing
     try:
-        provided_hmac = base64.b64decode(hmac_header)
-        return hmac.compare_digest(computed_hmac, provided_hmac)
-    except Exception:
+        provided_hmac = b64decode(hmac_header, validate=True)
+    except ValueError:
         return False
+    
+    # Compute HMAC-SHA256 of the body; one-shot digest with a string name
+    # runs entirely inside OpenSSL. Large payloads are hashed on a worker
+    # thread (OpenSSL releases the GIL) so the event loop stays responsive.
+    if len(body) < _INLINE_HMAC_MAX_BYTES:
+        computed_hmac = hmac.digest(secret, body, "sha256")
+    else:
+        computed_hmac = await anyio.to_thread.run_sync(hmac.digest, secret, body, "sha256")
+    
+    return hmac.compare_digest(computed_hmac, provided_hmac)
 
 
 @router.post("/webhooks/customers/create", summary="Handle Shopify customer creation")
@@ -89,13 +96,11 @@ async def handle_customer_create(
     Shopify API version: 2025-10
     """
     
-    settings = get_settings()
-    
     # Get raw body for HMAC verification
     body = await request.body()
     
     # Verify webhook signature
-    if not verify_shopify_webhook(body, x_shopify_hmac_sha256, settings.shopify_webhook_secret):
+    if not await verify_shopify_webhook(body, x_shopify_hmac_sha256, _settings.shopify_webhook_secret_bytes):
         logger.warning(
             f"Invalid Shopify webhook signature from {x_shopify_shop_domain}"
         )
@@ -109,9 +114,9 @@ async def handle_customer_create(
         f"shop={x_shopify_shop_domain}"
     )
     
-    # Parse JSON body
+    # Parse JSON body (already read for the signature check)
     try:
-        data = await request.json()
+        data = orjson.loads(body)
         customer = ShopifyCustomer(**data)
     except Exception as e:
         logger.error(f"Failed to parse Shopify customer data: {e}")
@@ -128,60 +133,30 @@ async def handle_customer_create(
             detail="Customer email is required"
         )
     
-    # Create or update user in database
+    display_name = None
+    if customer.first_name or customer.last_name:
+        display_name = f"{customer.first_name or ''} {customer.last_name or ''}".strip()
+    
+    # Create or update user in database in one round-trip; xmax is 0 only
+    # for freshly inserted rows
     try:
         async with conn.cursor() as cur:
-            # Check if user exists
             await cur.execute(
                 """
-                SELECT user_id FROM tv_app.users WHERE email = %s
+                INSERT INTO tv_app.users (email, display_name)
+                VALUES (%s, %s)
+                ON CONFLICT (email) DO UPDATE
+                SET display_name = COALESCE(EXCLUDED.display_name, tv_app.users.display_name)
+                RETURNING user_id, (xmax = 0) AS inserted
                 """,
-                (customer.email,),
+                (customer.email, display_name or None),
             )
-            existing_user = await cur.fetchone()
-            
-            if existing_user:
-                # Update display name if we have first/last name
-                display_name = None
-                if customer.first_name or customer.last_name:
-                    display_name = f"{customer.first_name or ''} {customer.last_name or ''}".strip()
-                
-                if display_name:
-                    await cur.execute(
-                        """
-                        UPDATE tv_app.users
-                        SET display_name = %s
-                        WHERE email = %s
-                        RETURNING user_id
-                        """,
-                        (display_name, customer.email),
-                    )
-                    user = await cur.fetchone()
-                else:
-                    user = existing_user
-                
-                logger.info(
-                    f"Updated existing user {user['user_id']} from Shopify customer {customer.id}"
-                )
-            else:
-                # Create new user
-                display_name = None
-                if customer.first_name or customer.last_name:
-                    display_name = f"{customer.first_name or ''} {customer.last_name or ''}".strip()
-                
-                await cur.execute(
-                    """
-                    INSERT INTO tv_app.users (email, display_name)
-                    VALUES (%s, %s)
-                    RETURNING user_id
-                    """,
-                    (customer.email, display_name),
-                )
-                user = await cur.fetchone()
-                
-                logger.info(
-                    f"Created new user {user['user_id']} from Shopify customer {customer.id}"
-                )
+            user = await cur.fetchone()
+        
+        logger.info(
+            f"{'Created new' if user['inserted'] else 'Updated existing'} user "
+            f"{user['user_id']} from Shopify customer {customer.id}"
+        )
         
         return WebhookResponse(
             success=True,
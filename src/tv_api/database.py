@@ -10,6 +10,15 @@ from psycopg_pool import AsyncConnectionPool
 from tv_api.config import get_settings
 
 
+async def _configure_connection(connection: psycopg.AsyncConnection) -> None:
+    """Prepare a freshly opened pool connection.
+
+    Runs once per physical connection rather than once per checkout.
+    """
+    # Use dict_row for dictionary-like row results
+    connection.row_factory = dict_row
+
+
 class Database:
     """Database connection pool manager."""
 
@@ -21,8 +30,16 @@ class Database:
         settings = get_settings()
         self.pool = AsyncConnectionPool(
             conninfo=settings.database_url,
-            min_size=2,
-            max_size=10,
+            min_size=settings.database_pool_min_size,
+            max_size=max(settings.database_pool_max_size, settings.database_pool_min_size),
+            # Release burst connections after a minute of idling
+            max_idle=60,
+            # With room for bursts, a checkout that still waits this long is
+            # failed rather than left queueing for psycopg_pool's 30s default
+            timeout=settings.database_pool_timeout,
+            # Prepare statements server-side once they have run once (default 5)
+            kwargs={"application_name": settings.app_name, "prepare_threshold": 1},
+            configure=_configure_connection,
             open=False,
         )
         await self.pool.open()
@@ -39,8 +56,6 @@ class Database:
             raise RuntimeError("Database pool not initialized")
         
         async with self.pool.connection() as connection:
-            # Use dict_row for dictionary-like row results
-            connection.row_factory = dict_row
             yield connection
 
 
@@ -1,29 +1,25 @@
 """Email sending utilities for magic link authentication."""
 
+import asyncio
 import logging
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+from email.message import EmailMessage
 
 import aiosmtplib
 
 from tv_api.config import get_settings
 
 logger = logging.getLogger(__name__)
+_settings = get_settings()
 
+# One SMTP session per worker, reused across sends so each email skips the
+# TCP/TLS handshake and AUTH; the lock keeps commands from interleaving
+_smtp_client: aiosmtplib.SMTP | None = None
+_smtp_lock = asyncio.Lock()
 
-def create_magic_link_email_html(
-    magic_link_url: str,
-    device_model: str | None,
-    device_manufacturer: str | None,
-    device_id: str,
-) -> str:
-    """Create HTML email body for magic link."""
-    
-    device_id_short = device_id[:8] if len(device_id) > 8 else device_id
-    device_model_display = device_model or "Unknown Device"
-    device_manufacturer_display = device_manufacturer or "Unknown Manufacturer"
-    
-    return f"""<!DOCTYPE html>
+
+# Static email bodies, built once at import; only the link and device
+# fields are substituted per send
+_HTML_TEMPLATE = """<!DOCTYPE html>
 <html>
 <head>
   <style>
@@ -62,8 +58,8 @@ def create_magic_link_email_html(
     
     <div class="device-info">
       <strong>Device Information:</strong><br>
-      Model: {device_model_display}<br>
-      Manufacturer: {device_manufacturer_display}<br>
+      Model: {device_model}<br>
+      Manufacturer: {device_manufacturer}<br>
       Device ID: {device_id_short}...
     </div>
     
@@ -78,20 +74,7 @@ def create_magic_link_email_html(
 </body>
 </html>"""
 
-
-def create_magic_link_email_text(
-    magic_link_url: str,
-    device_model: str | None,
-    device_manufacturer: str | None,
-    device_id: str,
-) -> str:
-    """Create plain text email body for magic link."""
-    
-    device_id_short = device_id[:8] if len(device_id) > 8 else device_id
-    device_model_display = device_model or "Unknown Device"
-    device_manufacturer_display = device_manufacturer or "Unknown Manufacturer"
-    
-    return f"""Sign in to dil.map
+_TEXT_TEMPLATE = """Sign in to dil.map
 
 Hi there!
 
@@ -100,8 +83,8 @@ Click the link below to sign in to dil.map on your Android TV:
 {magic_link_url}
 
 Device Information:
-Model: {device_model_display}
-Manufacturer: {device_manufacturer_display}
+Model: {device_model}
+Manufacturer: {device_manufacturer}
 Device ID: {device_id_short}...
 
 This link will expire in 15 minutes and can only be used once.
@@ -114,6 +97,86 @@ https://lucindadilworth.com
 """
 
 
+def _device_fields(
+    device_model: str | None,
+    device_manufacturer: str | None,
+    device_id: str,
+) -> dict[str, str]:
+    return {
+        "device_model": device_model or "Unknown Device",
+        "device_manufacturer": device_manufacturer or "Unknown Manufacturer",
+        "device_id_short": device_id[:8],
+    }
+
+
+def create_magic_link_email_html(
+    magic_link_url: str,
+    device_model: str | None,
+    device_manufacturer: str | None,
+    device_id: str,
+) -> str:
+    """Create HTML email body for magic link."""
+    
+    return _HTML_TEMPLATE.format(
+        magic_link_url=magic_link_url,
+        **_device_fields(device_model, device_manufacturer, device_id),
+    )
+
+
+def create_magic_link_email_text(
+    magic_link_url: str,
+    device_model: str | None,
+    device_manufacturer: str | None,
+    device_id: str,
+) -> str:
+    """Create plain text email body for magic link."""
+    
+    return _TEXT_TEMPLATE.format(
+        magic_link_url=magic_link_url,
+        **_device_fields(device_model, device_manufacturer, device_id),
+    )
+
+
+async def _connected_smtp_client() -> aiosmtplib.SMTP:
+    """Return the shared SMTP client, connecting (and logging in) if needed."""
+    global _smtp_client
+    
+    if _smtp_client is None:
+        if _settings.smtp_use_auth:
+            # Authenticated SMTP (Gmail, etc.) - use STARTTLS
+            _smtp_client = aiosmtplib.SMTP(
+                hostname=_settings.smtp_host,
+                port=_settings.smtp_port,
+                username=_settings.smtp_username,
+                password=_settings.smtp_password,
+                use_tls=False,
+                start_tls=True,
+            )
+        else:
+            # Unauthenticated local SMTP - no TLS
+            _smtp_client = aiosmtplib.SMTP(
+                hostname=_settings.smtp_host,
+                port=_settings.smtp_port,
+            )
+    
+    if not _smtp_client.is_connected:
+        await _smtp_client.connect()
+    return _smtp_client
+
+
+async def close_smtp_client() -> None:
+    """Close the shared SMTP session, if one is open."""
+    global _smtp_client
+    
+    async with _smtp_lock:
+        if _smtp_client is not None and _smtp_client.is_connected:
+            try:
+                await _smtp_client.quit()
+            except aiosmtplib.SMTPException:
+                _smtp_client.close()
+        _smtp_client = None
+
+
 async def send_magic_link_email(
     to_email: str,
     magic_link_url: str,
@@ -133,12 +196,10 @@ async def send_magic_link_email(
     Returns:
         True if email sent successfully, False otherwise
     """
-    settings = get_settings()
-    
     # Create message
-    message = MIMEMultipart("alternative")
+    message = EmailMessage()
     message["Subject"] = "Sign in to dil.map on your TV"
-    message["From"] = f"{settings.smtp_from_name} <{settings.smtp_from_email}>"
+    message["From"] = _settings.smtp_from_header
     message["To"] = to_email
     
     # Create plain text and HTML versions
@@ -149,39 +210,25 @@ async def send_magic_link_email(
         magic_link_url, device_model, device_manufacturer, device_id
     )
     
-    # Attach both versions
-    part1 = MIMEText(text_content, "plain")
-    part2 = MIMEText(html_content, "html")
-    message.attach(part1)
-    message.attach(part2)
+    # Plain text first, HTML as the preferred alternative. The email package
+    # picks 7bit for short ASCII lines and falls back to quoted-printable when
+    # a line (e.g. a long client-supplied device id) would exceed 998 chars.
+    message.set_content(text_content)
+    message.add_alternative(html_content, subtype="html")
     
     try:
         # Debug logging
-        logger.info(f"Attempting to send email via {settings.smtp_host}:{settings.smtp_port} as {settings.smtp_username}")
+        logger.info(f"Attempting to send email via {_settings.smtp_host}:{_settings.smtp_port} as {_settings.smtp_username}")
         
-        # Determine if we need TLS based on port and username
-        use_auth = bool(settings.smtp_username and settings.smtp_password)
-        use_starttls = settings.smtp_port == 587
-        
-        # Send email via SMTP
-        if use_auth:
-            # Authenticated SMTP (Gmail, etc.) - use STARTTLS
-            await aiosmtplib.send(
-                message,
-                hostname=settings.smtp_host,
-                port=settings.smtp_port,
-                username=settings.smtp_username,
-                password=settings.smtp_password,
-                use_tls=False,
-                start_tls=True,
-            )
-        else:
-            # Unauthenticated local SMTP - no TLS
-            await aiosmtplib.send(
-                message,
-                hostname=settings.smtp_host,
-                port=settings.smtp_port,
-            )
+        async with _smtp_lock:
+            client = await _connected_smtp_client()
+            try:
+                await client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                # The server dropped the idle connection; reconnect once
+                client.close()
+                await client.connect()
+                await client.send_message(message)
         
         logger.info(f"Magic link email sent successfully to {to_email}")
         return True
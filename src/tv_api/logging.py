@@ -2,41 +2,56 @@
 
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
+from functools import lru_cache
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
 
+_LOG_FORMAT = "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+
+# Loggers only enqueue records; the listener thread owns the console write.
+# tv_api loggers propagate to root, so each record is queued exactly once.
 _LOGGING_CONFIG = {
     "version": 1,
     "disable_existing_loggers": False,
-    "formatters": {
-        "standard": {
-            "format": "%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        },
-    },
     "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "standard",
-        }
+        "queue": {"()": "tv_api.logging._queue_handler"},
     },
     "loggers": {
-        "uvicorn": {"handlers": ["console"], "level": "INFO", "propagate": False},
-        "uvicorn.error": {"handlers": ["console"], "level": "INFO", "propagate": False},
-        "uvicorn.access": {"handlers": ["console"], "level": "INFO", "propagate": False},
-        "tv_api": {"handlers": ["console"], "level": "INFO"},
-        "tv_api.request": {"handlers": ["console"], "level": "INFO"},
+        "uvicorn": {"handlers": ["queue"], "level": "INFO", "propagate": False},
+        "uvicorn.error": {"handlers": ["queue"], "level": "INFO", "propagate": False},
+        "uvicorn.access": {"handlers": ["queue"], "level": "INFO", "propagate": False},
+        "tv_api": {"level": "INFO"},
+        "tv_api.request": {"level": "INFO"},
     },
 }
 
+_log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+_listener: QueueListener | None = None
+
+
+def _queue_handler() -> QueueHandler:
+    return QueueHandler(_log_queue)
+
 
 def configure_logging(level: str = "INFO") -> None:
     """Configure application-wide logging once."""
+    global _listener
+
+    dictConfig({**_LOGGING_CONFIG, "root": {"level": level.upper(), "handlers": ["queue"]}})
 
-    config = _LOGGING_CONFIG.copy()
-    config["root"] = {"level": level.upper(), "handlers": ["console"]}
-    dictConfig(config)
+    if _listener is None:
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter(_LOG_FORMAT))
+        _listener = QueueListener(_log_queue, console, respect_handler_level=True)
+        _listener.start()
+        # Stopping drains the queue, so records logged during shutdown still print
+        atexit.register(_listener.stop)
 
 
+@lru_cache(maxsize=None)
 def get_logger(name: str | None = None) -> logging.Logger:
     """Return a namespaced logger within the tv_api hierarchy."""
 
@@ -3,21 +3,28 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from tv_api.api.routers import auth, content, health, privacy, shopify, users
 from tv_api.config import get_settings
 from tv_api.database import db
+from tv_api.email import close_smtp_client
 from tv_api.logging import configure_logging
 from tv_api.middleware import RequestLoggingMiddleware
+from tv_api.rate_limit import rate_limiter
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle events."""
     # Startup
+    content.init_assets_root()
     await db.connect()
+    await rate_limiter.connect()
     yield
     # Shutdown
+    await close_smtp_client()
+    await rate_limiter.disconnect()
     await db.disconnect()
 
 
@@ -27,14 +34,19 @@ def create_application() -> FastAPI:
     settings = get_settings()
     configure_logging(settings.log_level)
 
-    app = FastAPI(title=settings.app_name, version="0.1.0", lifespan=lifespan)
-    app.add_middleware(RequestLoggingMiddleware)
+    app = FastAPI(
+        title=settings.app_name,
+        version="0.1.0",
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
+    )
     app.include_router(health.router)
     app.include_router(auth.router)
     app.include_router(content.router)
     app.include_router(privacy.router)
     app.include_router(shopify.router)
     app.include_router(users.router)
+    app.add_middleware(RequestLoggingMiddleware)
     return app
 
 
@@ -6,47 +6,88 @@ import logging
 import time
 import uuid
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 _logger = logging.getLogger("tv_api.request")
 
+# Completed requests log at INFO only when slow or failed; the rest at DEBUG
+_SLOW_REQUEST_MS = 500
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Log each HTTP request with timing and correlation id."""
+_REQUEST_ID_HEADER = b"x-request-id"
 
-    async def dispatch(self, request: Request, call_next) -> Response:  # type: ignore[override]
-        start = time.perf_counter()
-        request_id = request.headers.get("x-request-id", str(uuid.uuid4()))
-        client_host = request.client.host if request.client else "-"
-        _logger.info(
-            "request.start id=%s method=%s path=%s client=%s",
-            request_id,
-            request.method,
-            request.url.path,
-            client_host,
+
+def _client_host(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "-"
+
+
+class RequestLoggingMiddleware:
+    """Log each HTTP request with timing and correlation id.
+
+    Implemented as plain ASGI rather than ``BaseHTTPMiddleware`` so requests
+    aren't routed through an extra task and memory streams.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.monotonic_ns()
+        # ASGI header names arrive lower-cased; scan the raw pairs rather
+        # than building a Headers mapping
+        raw_request_id = next(
+            (value for key, value in scope["headers"] if key == _REQUEST_ID_HEADER), None
         )
+        if raw_request_id is None:
+            request_id = uuid.uuid4().hex
+            raw_request_id = request_id.encode("ascii")
+        else:
+            request_id = raw_request_id.decode("latin-1")
+        method = scope["method"]
+        path = scope["path"]
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = message.get("headers", ())
+                if not any(key.lower() == _REQUEST_ID_HEADER for key, _ in headers):
+                    # Copy rather than append: the list may belong to the response
+                    message["headers"] = [*headers, (_REQUEST_ID_HEADER, raw_request_id)]
+            await send(message)
+
         try:
-            response = await call_next(request)
-        except Exception as exc:  # pragma: no cover - defensive logging
-            duration = time.perf_counter() - start
+            await self.app(scope, receive, send_wrapper)
+        except Exception:  # pragma: no cover - defensive logging
             _logger.exception(
-                "request.error id=%s method=%s path=%s duration_ms=%d",
+                "request.error id=%s method=%s path=%s client=%s duration_ms=%d",
                 request_id,
-                request.method,
-                request.url.path,
-                int(duration * 1000),
+                method,
+                path,
+                _client_host(scope),
+                (time.monotonic_ns() - start) // 1_000_000,
             )
-            raise exc
-
-        duration = time.perf_counter() - start
-        response.headers.setdefault("x-request-id", request_id)
-        _logger.info(
-            "request.complete id=%s method=%s path=%s status=%s duration_ms=%d",
-            request_id,
-            request.method,
-            request.url.path,
-            response.status_code,
-            int(duration * 1000),
+            raise
+
+        duration_ms = (time.monotonic_ns() - start) // 1_000_000
+        level = (
+            logging.INFO
+            if status_code >= 400 or duration_ms >= _SLOW_REQUEST_MS
+            else logging.DEBUG
         )
-        return response
+        if _logger.isEnabledFor(level):
+            _logger.log(
+                level,
+                "request.complete id=%s method=%s path=%s client=%s status=%s duration_ms=%d",
+                request_id,
+                method,
+                path,
+                _client_host(scope),
+                status_code,
+                duration_ms,
+            )
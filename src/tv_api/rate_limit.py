@@ -0,0 +1,105 @@
+"""Redis-backed rate limiting shared across workers."""
+
+from redis.asyncio import BlockingConnectionPool, Redis
+from redis.exceptions import NoScriptError
+
+from tv_api.config import get_settings
+
+# Token bucket stored as a two-field hash (``tokens``, ``ts``). The bucket
+# refills ``capacity`` tokens per ``window`` seconds; each call consumes one.
+# Timestamps come from the Redis server clock so every worker and host shares
+# one time base. Returns ``{allowed, retry_after_seconds}`` atomically.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local rate = capacity / window
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  retry_after = math.ceil((1 - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], window)
+return {allowed, retry_after}
+"""
+
+_KEY_PREFIX = "tv_api:rate_limit:"
+
+
+class RateLimiter:
+    """Token-bucket rate limiter manager."""
+
+    def __init__(self):
+        self.redis: Redis | None = None
+        self._sha: str | None = None
+
+    async def connect(self):
+        """Create the Redis client and load the token-bucket script."""
+        settings = get_settings()
+        # Bounded per worker; callers wait for a free connection instead of
+        # opening new sockets under bursts
+        pool = BlockingConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            timeout=5,
+            health_check_interval=30,
+        )
+        self.redis = Redis.from_pool(pool)
+        self._sha = await self.redis.script_load(_TOKEN_BUCKET_LUA)
+
+    async def disconnect(self):
+        """Close the Redis client and its connection pool."""
+        if self.redis:
+            await self.redis.aclose()
+
+    async def check(self, limits: list[tuple[str, int]], window_hours: int = 1) -> int:
+        """Consume one token from each bucket in a single round-trip.
+
+        Args:
+            limits: ``(key, limit)`` pairs, e.g. ``("email:a@b.c", 3)``
+            window_hours: Time window in hours
+
+        Returns:
+            0 if every bucket allowed the request, otherwise the number of
+            seconds until the most restrictive bucket refills
+        """
+        if not self.redis or not self._sha:
+            raise RuntimeError("Rate limiter not initialized")
+
+        window_seconds = window_hours * 3600
+        try:
+            results = await self._consume(limits, window_seconds)
+        except NoScriptError:
+            # Script cache was flushed (Redis restart or SCRIPT FLUSH); every
+            # EVALSHA failed before running, so reloading and retrying is safe
+            self._sha = await self.redis.script_load(_TOKEN_BUCKET_LUA)
+            results = await self._consume(limits, window_seconds)
+
+        return max(
+            (int(retry_after) for allowed, retry_after in results if not allowed),
+            default=0,
+        )
+
+    async def _consume(self, limits: list[tuple[str, int]], window_seconds: int) -> list:
+        # Plain EVALSHA keeps the pipeline free of registered Script objects,
+        # which would make execute() send SCRIPT EXISTS first on every call
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, limit in limits:
+                pipe.evalsha(self._sha, 1, _KEY_PREFIX + key, limit, window_seconds)
+            return await pipe.execute()
+
+
+# Global rate limiter instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,96 @@
+"""Rate limiter tests."""
+
+from typing import Any
+
+import pytest
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.exceptions import NoScriptError
+
+from tv_api.rate_limit import RateLimiter
+
+
+def _limiter(
+    monkeypatch: pytest.MonkeyPatch, *outcomes: list[list[int]] | Exception
+) -> tuple[RateLimiter, list[list[tuple[Any, ...]]], list[tuple[Any, ...]], list[str]]:
+    """Build a limiter whose pipeline replays ``outcomes`` instead of hitting Redis."""
+
+    executes: list[list[tuple[Any, ...]]] = []
+    immediate: list[tuple[Any, ...]] = []
+    loads: list[str] = []
+    pending = list(outcomes)
+
+    async def execute(self: Pipeline, raise_on_error: bool = True) -> list[list[int]]:
+        # Mirror the real execute(): registered scripts cost an extra SCRIPT EXISTS
+        if self.scripts:
+            await self.load_scripts()
+        executes.append([args for args, _ in self.command_stack])
+        outcome = pending.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    async def immediate_execute_command(self: Pipeline, *args: Any, **options: Any) -> list[int]:
+        immediate.append(args)
+        return [1]
+
+    monkeypatch.setattr(Pipeline, "execute", execute)
+    monkeypatch.setattr(Pipeline, "immediate_execute_command", immediate_execute_command)
+
+    limiter = RateLimiter()
+    limiter.redis = Redis()
+
+    async def script_load(script: str) -> str:
+        loads.append(script)
+        return f"sha{len(loads)}"
+
+    monkeypatch.setattr(limiter.redis, "script_load", script_load)
+    limiter._sha = "sha0"
+    return limiter, executes, immediate, loads
+
+
+@pytest.mark.asyncio
+async def test_check_sends_every_bucket_in_one_execute(monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter, executes, immediate, loads = _limiter(monkeypatch, [[1, 0], [1, 0]])
+
+    retry_after = await limiter.check([("email:a@b.c", 3), ("ip:10.0.0.1", 10)])
+
+    assert retry_after == 0
+    assert executes == [
+        [
+            ("EVALSHA", "sha0", 1, "tv_api:rate_limit:email:a@b.c", 3, 3600),
+            ("EVALSHA", "sha0", 1, "tv_api:rate_limit:ip:10.0.0.1", 10, 3600),
+        ]
+    ]
+    assert immediate == []
+    assert loads == []
+
+
+@pytest.mark.asyncio
+async def test_check_returns_longest_retry_after_of_denied_buckets(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    limiter, _, _, _ = _limiter(monkeypatch, [[0, 120], [1, 0], [0, 900]])
+
+    retry_after = await limiter.check([("email:a@b.c", 3), ("ip:10.0.0.1", 10), ("x", 1)])
+
+    assert retry_after == 900
+
+
+@pytest.mark.asyncio
+async def test_check_reloads_script_once_after_noscript(monkeypatch: pytest.MonkeyPatch) -> None:
+    limiter, executes, _, loads = _limiter(
+        monkeypatch, NoScriptError("No matching script"), [[0, 60]]
+    )
+
+    retry_after = await limiter.check([("email:a@b.c", 3)])
+
+    assert retry_after == 60
+    assert len(loads) == 1
+    assert [command[1] for batch in executes for command in batch] == ["sha0", "sha1"]
+
+
+@pytest.mark.asyncio
+async def test_check_requires_connect() -> None:
+    with pytest.raises(RuntimeError):
+        await RateLimiter().check([("email:a@b.c", 3)])
@@ -0,0 +1,91 @@
+"""Custom response class tests."""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from tv_api.responses import ZeroCopyFileResponse
+
+
+async def _call(
+    response: ZeroCopyFileResponse,
+    extensions: dict[str, Any],
+    headers: list[tuple[bytes, bytes]] | None = None,
+) -> list[dict[str, Any]]:
+    scope = {"type": "http", "method": "GET", "headers": headers or [], "extensions": extensions}
+    messages: list[dict[str, Any]] = []
+
+    async def receive() -> dict[str, Any]:  # pragma: no cover - never awaited
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        if message["type"] == "http.response.zerocopysend":
+            message = {**message, "data": message["file"].read()}
+        messages.append(message)
+
+    await response(scope, receive, send)
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_zerocopysend_hands_open_file_to_server(tmp_path: Path) -> None:
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"0123456789")
+
+    messages = await _call(ZeroCopyFileResponse(path), {"http.response.zerocopysend": {}})
+
+    assert messages[0]["type"] == "http.response.start"
+    assert messages[1]["type"] == "http.response.zerocopysend"
+    assert messages[1]["data"] == b"0123456789"
+    assert messages[1]["file"].closed
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_chunked_body_without_extensions(tmp_path: Path) -> None:
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"0123456789")
+
+    messages = await _call(ZeroCopyFileResponse(path), {})
+
+    assert [m["type"] for m in messages] == ["http.response.start", "http.response.body"]
+    assert messages[1]["body"] == b"0123456789"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("extensions", [{}, {"http.response.pathsend": {}}])
+async def test_range_request_returns_partial_content(tmp_path: Path, extensions: dict[str, Any]) -> None:
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"0123456789")
+
+    messages = await _call(ZeroCopyFileResponse(path), extensions, [(b"range", b"bytes=2-5")])
+
+    headers = dict(messages[0]["headers"])
+    assert messages[0]["status"] == 206
+    assert headers[b"content-range"] == b"bytes 2-5/10"
+    assert headers[b"content-length"] == b"4"
+    assert b"".join(m["body"] for m in messages[1:]) == b"2345"
+
+
+@pytest.mark.asyncio
+async def test_range_request_passes_offset_to_zerocopysend(tmp_path: Path) -> None:
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"0123456789")
+
+    messages = await _call(
+        ZeroCopyFileResponse(path), {"http.response.zerocopysend": {}}, [(b"range", b"bytes=-3")]
+    )
+
+    assert messages[0]["status"] == 206
+    assert (messages[1]["offset"], messages[1]["count"]) == (7, 3)
+
+
+@pytest.mark.asyncio
+async def test_unsatisfiable_range_returns_416(tmp_path: Path) -> None:
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"0123456789")
+
+    messages = await _call(ZeroCopyFileResponse(path), {}, [(b"range", b"bytes=20-")])
+
+    assert messages[0]["status"] == 416
+    assert dict(messages[0]["headers"])[b"content-range"] == b"bytes */10"
@@ -1,5 +1,7 @@
 """API contract tests."""
 
+import hashlib
+import os
 from collections.abc import AsyncIterator
 from pathlib import Path
 
@@ -7,19 +9,22 @@ import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
 
+from tv_api.api.routers import content
 from tv_api.main import app
 
 ASSETS_DIR = Path(__file__).resolve().parents[1] / "assets"
 
+# Share one event loop so the session-scoped client below can be reused
+pytestmark = pytest.mark.asyncio(scope="session")
 
-@pytest_asyncio.fixture()
+
+@pytest_asyncio.fixture(scope="session")
 async def api_client() -> AsyncIterator[AsyncClient]:
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://testserver") as client:
         yield client
 
 
-@pytest.mark.asyncio
 async def test_health_endpoint(api_client: AsyncClient) -> None:
     response = await api_client.get("/health")
     assert response.status_code == 200
@@ -27,14 +32,12 @@ async def test_health_endpoint(api_client: AsyncClient) -> None:
     assert payload["status"] == "ok"
 
 
-@pytest.mark.asyncio
 async def test_readiness_endpoint(api_client: AsyncClient) -> None:
     response = await api_client.get("/readiness")
     assert response.status_code == 200
     assert response.json() == {"status": "ready"}
 
 
-@pytest.mark.asyncio
 async def test_content_listing(api_client: AsyncClient) -> None:
     response = await api_client.get("/content")
     assert response.status_code == 200
@@ -43,22 +46,58 @@ async def test_content_listing(api_client: AsyncClient) -> None:
     assert (ASSETS_DIR / "h-6.mp4").name in names
 
 
-@pytest.mark.asyncio
+async def test_content_listing_refreshes_when_directory_changes(
+    api_client: AsyncClient, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(content, "_assets_root_path", tmp_path)
+    monkeypatch.setattr(content, "_listing_cache", None)
+    (tmp_path / "first.txt").write_bytes(b"first")
+
+    response = await api_client.get("/content")
+    assert [item["name"] for item in response.json()["items"]] == ["first.txt"]
+
+    (tmp_path / "second.txt").write_bytes(b"second")
+    # Step the directory mtime explicitly so coarse timestamps can't hide the change
+    mtime_ns = tmp_path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+
+    response = await api_client.get("/content")
+    assert [item["name"] for item in response.json()["items"]] == ["first.txt", "second.txt"]
+
+
 async def test_content_download(api_client: AsyncClient) -> None:
     filename = "h-6.mp4"
+    expected = hashlib.blake2b(digest_size=16)
+    with (ASSETS_DIR / filename).open("rb") as f:
+        while block := f.read(1 << 20):
+            expected.update(block)
+
+    received = hashlib.blake2b(digest_size=16)
+    async with api_client.stream("GET", f"/content/{filename}") as response:
+        assert response.status_code == 200
+        assert filename in response.headers.get("content-disposition", "")
+        async for chunk in response.aiter_bytes():
+            received.update(chunk)
+    assert received.digest() == expected.digest()
+
+
+async def test_content_download_revalidates_with_etag(api_client: AsyncClient) -> None:
+    filename = "alyeska-640.jpg"
     response = await api_client.get(f"/content/{filename}")
-    assert response.status_code == 200
-    assert filename in response.headers.get("content-disposition", "")
-    assert response.content == (ASSETS_DIR / filename).read_bytes()
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"].startswith("public")
+
+    cached = await api_client.get(f"/content/{filename}", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
 
 
-@pytest.mark.asyncio
 async def test_content_disallows_path_traversal(api_client: AsyncClient) -> None:
     response = await api_client.get("/content/../pyproject.toml")
     assert response.status_code == 404
 
 
-@pytest.mark.asyncio
 async def test_privacy_endpoint_returns_policy(api_client: AsyncClient) -> None:
     response = await api_client.get("/privacy")
     assert response.status_code == 200
@@ -67,10 +106,23 @@ async def test_privacy_endpoint_returns_policy(api_client: AsyncClient) -> None:
     assert payload["application"] == "dil.map"
 
 
-@pytest.mark.asyncio
 async def test_user_endpoint_echoes_email(api_client: AsyncClient) -> None:
     response = await api_client.post("/user", json={"email": "demo@example.com"})
     assert response.status_code == 200
     payload = response.json()
     assert payload["email"] == "demo@example.com"
     assert payload["message"] == "Email received"
+
+
+async def test_content_download_rejects_dot_segments(api_client: AsyncClient) -> None:
+    for raw in ("%2E%2E", "..%5Ch-6.mp4"):
+        response = await api_client.get(f"/content/{raw}")
+        assert response.status_code == 404
+
+
+async def test_request_id_is_echoed_or_generated(api_client: AsyncClient) -> None:
+    response = await api_client.get("/health", headers={"x-request-id": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+
+    response = await api_client.get("/health")
+    assert response.headers["x-request-id"]